@@ -4,23 +4,352 @@ within the last 30 days"""
 
 import argparse
 import os
-import sys
+import random
+import re
 import logging
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from csv import writer
+from functools import lru_cache
 
+import lxml.html
+from lxml.etree import XPath
 import pandas as pd
 from selenium import webdriver
 from selenium.common.exceptions import (ElementClickInterceptedException,
                                         ElementNotInteractableException,
-                                        NoSuchElementException)
+                                        NoSuchElementException,
+                                        TimeoutException,
+                                        WebDriverException)
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
 from tqdm import tqdm
 from webdriver_manager.chrome import ChromeDriverManager
 
+# locators for the job details, compiled once; the XPaths are evaluated against the lxml tree of each job
+XP_COMPANY = XPath('.//div[@class="css-xuk5ye e1tk4kwz5"]')
+XP_LOCATION = XPath('.//div[@class="css-56kyx5 e1tk4kwz1"]')
+XP_JOBTITLE = XPath('.//div[@class="css-1j389vi e1tk4kwz2"]')
+XP_DESC = XPath('.//div[@class="jobDescriptionContent desc"]')
+XP_SALARY = XPath('.//div[@class="css-y2jiyn e2u4hf18"]')
+XP_RATING = XPath('.//span[@data-test="detailRating"]')
+XP_COMPANYDETAILS = XPath('//div[@class="d-flex justify-content-start css-daag8o e1pvx6aw2"]')
+# the value of the subrating with the given label: the next subrating span after the label, if it is a number /
+# (otherwise the label has no value, and the next span is the following subrating's label)
+XP_SUBRATING = XPath(
+    '//span[@class="css-1hszvfg erz4gkm1"][normalize-space()=$label]'
+    '/following::span[@class="css-1hszvfg erz4gkm1"][1][number(.) = number(.)]'
+)
+
+# elements rendered on their own line(s); the text of any other element (e.g. <b>, <a>, <span>) stays on the same line
+BLOCK_TAGS = frozenset({
+    'p', 'div', 'br', 'li', 'ul', 'ol', 'dl', 'dt', 'dd', 'table', 'tr',
+    'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'section', 'article', 'header', 'footer', 'blockquote', 'pre', 'hr',
+})
+WHITESPACE = re.compile(r'\s+')
+
+# locators used to wait for elements with Selenium
+JOB_LISTINGS_LOCATOR = (By.CLASS_NAME, "react-job-listing")
+JOB_DESCRIPTION_LOCATOR = (By.XPATH, './/div[@class="jobDescriptionContent desc"]')
+
+# the job details scraped, in the order of the columns of the results
+COLS = (
+    "job_title",
+    "salary_estimate",
+    "job_description",
+    "rating",
+    "company_name",
+    "location",
+    "size",
+    "founded",
+    "type of ownership",
+    "industry",
+    "sector",
+    "revenue",
+    "rating_culturevalues",
+    "rating_worklifebalance",
+    "rating_seniormgmt",
+    "rating_compbenefits",
+    "rating_careerops",
+)
+
+# URL patterns blocked by the webdrivers (analytics, ads, images and fonts)
+BLOCKED_URLS = [
+    '*doubleclick.net*',
+    '*googletagmanager.com*',
+    '*google-analytics.com*',
+    '*segment.io*',
+    '*newrelic.com*',
+    '*.jpg',
+    '*.png',
+    '*.woff2',
+]
+
+# the number of rows written to the results csv file at a time
+CSV_BATCH_SIZE = 50
+
+
+@lru_cache(maxsize=None)
+def get_driver_path():
+    '''Installs the chromedriver for the installed version of Chrome if needed, and returns its path; /
+    resolved once per Python session and shared by all webdrivers, with the download cached in .wdm for 7 days'''
+    return ChromeDriverManager(path='.wdm', cache_valid_range=7).install()
+
+
+def init_driver():
+    '''Initialises a headless Chrome webdriver that doesn't load images, trackers or ads'''
+    options = webdriver.ChromeOptions()
+    options.add_argument("--window-size=1120,1000")
+    options.add_argument("--headless=new")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--blink-settings=imagesEnabled=false")
+    options.add_experimental_option("prefs", {
+        "profile.managed_default_content_settings.images": 2,  # block images
+        "profile.default_content_setting_values.notifications": 2,  # block notification prompts
+    })
+    options.page_load_strategy = 'eager'  # return from page loads once the DOM is ready, without waiting for images, stylesheets etc
+    driver = webdriver.Chrome(
+        options=options,
+        service=Service(get_driver_path())
+    )
+    # block trackers, ads, images and fonts, none of which are needed to scrape the jobs
+    driver.execute_cdp_cmd('Network.enable', {})
+    driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': BLOCKED_URLS})
+    driver.implicitly_wait(0)   # no implicit wait, so optional elements that are missing fail fast; explicit waits are used where polling is needed
+    return driver
+
+
+def get_jobdetails_tree(driver):
+    '''Reads the HTML of the job details panel in a single WebDriver call, /
+    returned as an lxml tree so job details can be found without further calls to the browser'''
+    try:
+        html = driver.find_element(
+            by=By.CSS_SELECTOR,
+            value='div.jobDetails, div[data-test="jobDetails"]'
+        ).get_attribute('outerHTML')
+    except NoSuchElementException:
+        html = driver.page_source  # fall back to the whole page
+    return lxml.html.fromstring(html)
+
+
+def element_text(element):
+    '''Returns the text of an lxml element with line breaks only at block elements and whitespace collapsed, /
+    similar to the rendered text of a Selenium WebElement (inline elements, e.g. <b> and <a>, stay on the same line)'''
+    parts = []
+
+    def add_text(text):
+        if text:
+            parts.append(WHITESPACE.sub(' ', text))  # whitespace in the HTML source, including newlines, renders as one space
+
+    def walk(el):
+        if isinstance(el.tag, str):  # comments and processing instructions have no rendered text
+            block = el.tag in BLOCK_TAGS
+            if block:
+                parts.append('\n')
+            add_text(el.text)
+            for child in el:
+                walk(child)
+                add_text(child.tail)
+            if block:
+                parts.append('\n')
+
+    walk(element)
+    lines = (' '.join(line.split()) for line in ''.join(parts).split('\n'))  # spaces either side of an inline element are one space
+    return '\n'.join(line for line in lines if line)
+
+
+def flex_text(element):
+    '''Returns the text of an lxml flex container with each flex item (child element, or text directly inside the container) /
+    on its own line, as Selenium renders them, e.g. the company name and rating in the job header'''
+    items = [WHITESPACE.sub(' ', element.text or '')]
+    for child in element:
+        if isinstance(child.tag, str):
+            items.append(element_text(child))
+        items.append(WHITESPACE.sub(' ', child.tail or ''))
+    return '\n'.join(item.strip() for item in items if item.strip())
+
+
+def scrape_job(driver, job_url, job_number, company_cache=None):
+    '''Loads a job page with the given webdriver and scrapes the job details, /
+    returned as a tuple in the order of COLS; company ratings and details are reused from company_cache /
+    (a dictionary keyed by company name, shared between jobs) if the company has been seen before'''
+    if company_cache is None:
+        company_cache = {}
+    logger = logging.getLogger(__name__)
+    logger.info(f"\n\nJOB {job_number}...\n")
+    wait = WebDriverWait(driver, 10)
+
+    # load job
+    driver.get(job_url)
+    try:
+        wait.until(EC.presence_of_element_located(JOB_DESCRIPTION_LOCATOR))
+    except TimeoutException:
+        logger.debug(f'TimeoutException: Job {job_number} description did not load')  # falls through to the retry below
+
+    # read the job details once and parse them locally, rather than asking the browser for each element
+    tree = get_jobdetails_tree(driver)
+
+    # save details from job header and job tab
+    # COMPANY NAME
+    company_name = XP_COMPANY(tree)
+    if company_name:
+        company_name = flex_text(company_name[0])  # the name and the rating are separate flex items, so the name ends in a newline and the rating
+        logger.debug('Company name scraped')
+        logger.info(f"Company Name: {company_name}")
+    else:
+        company_name = -1  # set a "not found" value
+        logger.error(f'Element not found: Tried to save company name (job {job_number})')
+
+    # JOB LOCATION
+    location = XP_LOCATION(tree)
+    if location:
+        location = element_text(location[0])
+        logger.debug('Job location scraped')
+        logger.info(f"Location: {location}")
+    else:
+        location = -1
+        logger.error(f'Element not found: Tried to save job location (job {job_number})')
+
+    # JOB TITLE
+    job_title = XP_JOBTITLE(tree)
+    if job_title:
+        job_title = element_text(job_title[0])
+        logger.debug('Job title scraped')
+        logger.info(f"Job Title: {job_title}")
+    else:
+        job_title = -1
+        logger.error(f'Element not found: Tried to save job title (job {job_number})')
+
+    # from job page
+    # JOB DESCRIPTION
+    job_description = XP_DESC(tree)
+    if job_description:
+        job_description = element_text(job_description[0])
+        logger.debug('Job description scraped')
+        logger.info(f"Job Description: {str(job_description)[:50]}")
+    else:
+        logger.error(f'Element not found: Tried to save job description but it is not available (job {job_number})')
+        logger.debug('Trying to reload the job page')
+        driver.get(job_url)
+        try:
+            wait.until(EC.presence_of_element_located(JOB_DESCRIPTION_LOCATOR))
+        except TimeoutException:
+            pass
+        tree = get_jobdetails_tree(driver)
+        job_description = XP_DESC(tree)
+        if job_description:
+            job_description = element_text(job_description[0])
+        else:
+            logger.error(f'Element not found: Tried to save job description a second time but it is still not available (job {job_number})')
+            job_description = -1
 
-def get_jobs(num_jobs, verbose, path):
+    # SALARY ESTIMATE
+    salary_estimate = XP_SALARY(tree)
+    if salary_estimate:
+        salary_estimate = element_text(salary_estimate[0])
+        logger.debug('Salary estimate scraped')
+        logger.info(f"Salary Estimate: {salary_estimate}")
+    else:
+        salary_estimate = -1
+        logger.error(f'Element not found: Tried to save salary estimate (job {job_number})')
+
+    # company ratings and details are the same for every job at a company, so they are only scraped for the first job seen
+    if company_name in company_cache:
+        (rating, size, founded, type_of_ownership, industry, sector, revenue,
+         rating_culturevalues, rating_worklifebalance, rating_seniormgmt, rating_compbenefits, rating_careerops) = company_cache[company_name]
+        logger.debug(f"Company ratings and details already scraped for {company_name}")
+    else:
+        # COMPANY RATING (OVERALL)
+        rating = XP_RATING(tree)
+        if rating:
+            rating = element_text(rating[0])
+            logger.debug('Company rating (overall) scraped')
+        else:
+            rating = -1
+            logger.error(f'Element not found: Tried to save company rating (overall) (job {job_number})')
+        logger.info(f"Rating: {rating}")
+
+        # COMPANY DETAILS
+        # find elements with company details
+        companydetails = XP_COMPANYDETAILS(tree)
+        if not companydetails:
+            logger.error(f"Element not found: Tried to save company details in Company tab (company details missing) (job {job_number})")
+        # create a dict of company details so they can be searched; the elements containing company details /
+        # include both the label and the value, as separate flex items that are rendered on separate lines
+        companydetails_dict = {}
+        for detail in companydetails:
+            label, _, value = flex_text(detail).partition("\n")
+            if value:  # skip company details without a value
+                companydetails_dict[label] = value
+        # search dict and assign company detail variables
+        size = companydetails_dict.get('Size', -1)
+        founded = companydetails_dict.get('Founded', -1)
+        type_of_ownership = companydetails_dict.get('Type', -1)
+        industry = companydetails_dict.get('Industry', -1)
+        sector = companydetails_dict.get('Sector', -1)
+        revenue = companydetails_dict.get('Revenue', -1)
+        logger.debug("Finished looking for COMPANY DETAILS")
+        logger.info(f"Size: {size}")
+        logger.info(f"Founded: {founded}")
+        logger.info(f"Type of Ownership: {type_of_ownership}")
+        logger.info(f"Industry: {industry}")
+        logger.info(f"Sector: {sector}")
+        logger.info(f"Revenue: {revenue}")
+
+        # SUBRATINGS
+        # find the value of each subrating by its label, so a missing label or value only affects that subrating
+        subratings_dict = {}
+        for label in ('Culture & Values', 'Work/Life Balance', 'Senior Management', 'Comp & Benefits', 'Career Opportunities'):
+            value = XP_SUBRATING(tree, label=label)
+            if value:
+                subratings_dict[label] = element_text(value[0])
+        if not subratings_dict:
+            logger.error(f"Element not found: Tried to save subratings (subratings missing) (job {job_number})")
+        # search dict and assign company detail variables
+        rating_culturevalues = subratings_dict.get('Culture & Values', -1)
+        rating_worklifebalance = subratings_dict.get('Work/Life Balance', -1)
+        rating_seniormgmt = subratings_dict.get('Senior Management', -1)
+        rating_compbenefits = subratings_dict.get('Comp & Benefits', -1)
+        rating_careerops = subratings_dict.get('Career Opportunities', -1)
+        logger.debug("Finished looking for SUBRATINGS")
+        logger.info(f"Culture & Values: {rating_culturevalues}")
+        logger.info(f"Work/Life Balance: {rating_worklifebalance}")
+        logger.info(f"Senior Management: {rating_seniormgmt}")
+        logger.info(f"Comp & Benefits: {rating_compbenefits}")
+        logger.info(f"Career Opportunities: {rating_careerops}")
+
+        # save for other jobs at the same company, unless the company details failed to load
+        if (company_name != -1) and companydetails:
+            company_cache[company_name] = (
+                rating, size, founded, type_of_ownership, industry, sector, revenue,
+                rating_culturevalues, rating_worklifebalance, rating_seniormgmt, rating_compbenefits, rating_careerops
+            )
+
+    return (
+        job_title,
+        salary_estimate,
+        job_description,
+        rating,
+        company_name,
+        location,
+        size,
+        founded,
+        type_of_ownership,
+        industry,
+        sector,
+        revenue,
+        rating_culturevalues,
+        rating_worklifebalance,
+        rating_seniormgmt,
+        rating_compbenefits,
+        rating_careerops,
+    )
+
+
+def get_jobs(num_jobs, verbose, path, workers=10):
     '''Scrapes glassdoor.co.uk for UK data scientist job data, /
     returned as a pandas DataFrame or saved as a CSV file'''
 
@@ -53,9 +382,24 @@ def get_jobs(num_jobs, verbose, path):
         else:
             return input
 
-    # validate num_jobs and path
+    # a function to validate the number of workers given
+    def validateworkers(input):
+        if isinstance(input, int):
+            if input <= 0:
+                raise ValueError(
+                    "workers must be at least 1"
+                )
+            else:
+                return input
+        else:
+            raise TypeError(
+                "workers must be a positive integer"
+            )
+
+    # validate num_jobs, path and workers
     num_jobs = validatenumjobs(num_jobs)
     path = validatepath(path)
+    workers = validateworkers(workers)
 
     # set up logger
     class TqdmLoggingHandler(logging.Handler):
@@ -91,373 +435,211 @@ def get_jobs(num_jobs, verbose, path):
         filename = os.path.join('data', f'glassdoor_scrape_{datetime}.csv')
         logger.debug(f"Path provided so data for {num_jobs} jobs will be written to a CSV file ({filename})")
     else:
-        # initialise a list of dictionaries with job data, called jobs
+        # initialise a list of tuples with job data, called jobs
         jobs = []
         logger.debug(f"Path NOT provided so data for {num_jobs} jobs will returned as a pandas DataFrame")
 
-    # initialize the webdriver
+    # initialize the webdriver used to page through the job listings
     logger.debug('Initializing webdriver')
-    options = webdriver.ChromeOptions()
-    options.add_argument("--window-size=1120,1000")
-    driver = webdriver.Chrome(
-        options=options,
-        service=Service(ChromeDriverManager().install())
-    )
-    driver.implicitly_wait(1)   # implicitly_wait puts in a retry loop to check for an element on a set interval (every X milliseconds), to see if an element exists
-    url = 'https://www.glassdoor.co.uk/Job/uk-data-scientist-jobs-SRCH_IL.0,2_IN2_KO3,17.htm?fromAge=30'
-    driver.get(url)
-
-    # start job counter and next page counter
-    job_counter = 0
-    nextpage_counter = 0
-
-    # initialise the progress bar
-    pbar = tqdm(desc='Progress', total=num_jobs)
-
-    # set today's date
-    date = time.strftime('%d %B', time.localtime())
-    if date[0] == '0':
-        date = date[1:]
-    logger.debug(f'Todays date:{date}')
-
-    # while the list of jobs in smaller than the target, keep looking for new job ads
-    while job_counter < num_jobs:
+    driver = init_driver()
+    wait = WebDriverWait(driver, 10)  # explicit waits return as soon as the element needed next is in the DOM
+    try:
+        url = 'https://www.glassdoor.co.uk/Job/uk-data-scientist-jobs-SRCH_IL.0,2_IN2_KO3,17.htm?fromAge=30'
+        driver.get(url)
+
+        # initialise the list of links to job pages, the ids of the jobs found, and the next page counter
+        job_urls = []
+        seen_job_ids = set()
+        nextpage_counter = 0
+
+        # pop-ups only need closing once per session, so stop looking for them once closed
+        cookies_popup_closed = False
+        signup_popup_closed = False
+
+        # set today's date
+        date = time.strftime('%d %B', time.localtime())
+        if date[0] == '0':
+            date = date[1:]
+        logger.debug(f'Todays date:{date}')
+
+        # while the list of job links is smaller than the target, keep looking for new job ads
+        while len(job_urls) < num_jobs:
+
+            # log page
+            logger.info(f"--PAGE {nextpage_counter+1}--...")
+
+            # wait for the job listings on the page to load
+            try:
+                wait.until(EC.presence_of_all_elements_located(JOB_LISTINGS_LOCATOR))
+            except TimeoutException:
+                logger.error(f"TimeoutException: Job listings on page {nextpage_counter+1} did not load")
 
-        # log page
-        logger.info(f"--PAGE {nextpage_counter+1}--...")
+            # close the cookies pop-up
+            if not cookies_popup_closed:
+                try:
+                    driver.find_element(by=By.ID, value='onetrust-accept-btn-handler').click()  # clicking the "X"
+                except NoSuchElementException:
+                    pass
+                except ElementNotInteractableException:
+                    pass
+                else:
+                    cookies_popup_closed = True
+                    logger.debug('Closed cookies pop-up')
+                finally:
+                    logger.debug('Checked for cookies pop-up')
 
-        # sleep to let the page load
-        time.sleep(4)
+            # the "sign-up for emails" pop-up may block the next page button; look for it and close by clicking "X"
+            if not signup_popup_closed:
+                try:
+                    driver.find_element(
+                        by=By.XPATH,
+                        value='.//*[@id="JAModal"]/div/div[2]/span').click()
+                except NoSuchElementException:
+                    pass
+                else:
+                    signup_popup_closed = True
+                    logger.debug('Closed "sign-up for emails" pop-up')
+                finally:
+                    logger.debug('Checked for "sign-up for emails" pop-up')
 
-        # close the cookies pop-up
-        try:
-            driver.find_element(by=By.ID, value='onetrust-accept-btn-handler').click()  # clicking the "X"
-        except NoSuchElementException:
-            pass
-        except ElementNotInteractableException:
-            pass
-        else:
-            logger.debug('Closed cookies pop-up')
-        finally:
-            logger.debug('Checked for cookies pop-up')
+            # find the links to all jobs listed on the current page
+            job_links = driver.find_elements(*JOB_LISTINGS_LOCATOR)
 
-        # find the links to all jobs listed on the current page
-        job_links = driver.find_elements(by=By.CLASS_NAME, value="react-job-listing")
+            # save the link to each job page listed on the current page, skipping jobs already listed on an earlier page
+            new_job_urls = 0
+            for job_link in job_links:
+                try:
+                    job_url = job_link.find_element(by=By.TAG_NAME, value='a').get_attribute('href')
+                except NoSuchElementException:
+                    logger.error(f'NoSuchElementException: Tried to save a link to a job page on page {nextpage_counter+1}')
+                    continue
+                job_id = job_link.get_attribute('data-id') or job_url  # the job listing id; the link also changes with the position in the listings
+                if job_id in seen_job_ids:
+                    continue
+                seen_job_ids.add(job_id)
+                job_urls.append(job_url)
+                new_job_urls += 1
+
+                # check whether you need to continue collecting job links
+                if len(job_urls) == num_jobs:
+                    logger.debug(f"Target reached: Job links found = {len(job_urls)} | Target = {num_jobs}")
+                    break
+
+            if len(job_urls) == num_jobs:
+                logger.debug("TARGET NUMBER OF JOB LINKS FOUND")
+                break
 
-        # check if all jobs on the page have already been scraped (time to quit)
-        try:
-            vieweddate = driver.find_elements(by=By.XPATH, value='.//div[@data-test="viewedDate"]')
-        except NoSuchElementException:
-            logger.debug(f"Tried to check how many jobs with a 'viewed date' are on page {nextpage_counter+1}")
-        else:
-            if (len(vieweddate) == len(job_links)):
-                logger.info(f'ALL JOBS ON PAGE {nextpage_counter+1} HAVE ALREADY BEEN SCRAPED')
+            # check if all jobs on the page have already been found on earlier pages (time to quit)
+            if new_job_urls == 0:
+                logger.info(f'ALL JOBS ON PAGE {nextpage_counter+1} HAVE ALREADY BEEN FOUND; scraping terminated before reaching target number of jobs. Needed {num_jobs}, got {len(job_urls)}.')
                 break
             else:
-                logger.info(f"{len(vieweddate)} JOBS ON PAGE {nextpage_counter+1} HAVE ALREADY BEEN SCRAPED")
-        finally:
-            logger.debug('Checked how many jobs on this page have already been viewed')
-
-        # iterate through all the job links on the current page and scrape data
-        for job_link in job_links:
-
-            # update job counter
-            job_counter += 1
-            logger.info(f"\n\nJOB {job_counter} OF {num_jobs}...\n")
-
-            # load job; starts on the JOB tab
-            job_link.click()
-            time.sleep(3)
+                logger.info(f"{len(job_links) - new_job_urls} JOBS ON PAGE {nextpage_counter+1} HAVE ALREADY BEEN FOUND")
 
-            # successfully loading a new job may trigger a "sign-up for emails" pop-up; look for it and close by clicking "X"
+            # click on the "next page" button
+            logger.debug("Trying to click the next page")
             try:
                 driver.find_element(
                     by=By.XPATH,
-                    value='.//*[@id="JAModal"]/div/div[2]/span').click()
+                    value='.//button[@class="nextButton css-1hq9k8 e13qs2071"]'
+                ).click()
+                wait.until(EC.staleness_of(job_links[0]))  # the previous page's listings are replaced once the next page loads
+                wait.until(EC.url_contains("pgc="))
             except NoSuchElementException:
-                pass
+                logger.error(f"NoSuchElementException: Link to next page unavailable; scraping terminated before reaching target number of jobs. Needed {num_jobs}, got {len(job_urls)}.")
+                break
+            except ElementClickInterceptedException:
+                logger.error(f"ElementClickInterceptedException: Couldn't click next page button; scraping terminated before reaching target number of jobs. Needed {num_jobs}, got {len(job_urls)}.")
+                break
+            except TimeoutException:
+                logger.error(f'TimeoutException: Next page did not load or "pgc=" not in URL, likely showing duplicate jobs; scraping terminated before reaching target number of jobs. Needed {num_jobs}, got {len(job_urls)}.')
+                break
             else:
-                logger.debug('Closed "sign-up for emails" pop-up')
-            finally:
-                logger.debug('Checked for "sign-up for emails" pop-up')
+                logger.debug("Clicked next page")
+                nextpage_counter += 1
+    finally:
+        driver.quit()  # the listing webdriver isn't needed once the job links have been found, or if paging fails
 
-            # save details from job header and job tab
-            # COMPANY NAME
-            try:
-                company_name = driver.find_element(
-                    by=By.XPATH,
-                    value='.//div[@class="css-xuk5ye e1tk4kwz5"]'
-                ).text
-            except NoSuchElementException:
-                company_name = -1  # set a "not found" value
-                logger.error('NoSuchElementException: Tried to save company name')
-            else:
-                logger.debug('Company name scraped')
-                logger.info(f"Company Name: {company_name}")
+    logger.info(f"Found links to {len(job_urls)} job pages; scraping them with {workers} workers")
 
-            # JOB LOCATION
-            try:
-                location = driver.find_element(
-                    by=By.XPATH,
-                    value='.//div[@class="css-56kyx5 e1tk4kwz1"]'
-                ).text
-            except NoSuchElementException:
-                location = -1
-                logger.error('NoSuchElementException: Tried to save company name')
-            else:
-                logger.debug('Job location scraped')
-                logger.info(f"Location: {location}")
+    # company ratings and details scraped so far, shared by all workers
+    company_cache = {}
 
-            # JOB TITLE
-            try:
-                job_title = driver.find_element(
-                    by=By.XPATH,
-                    value='.//div[@class="css-1j389vi e1tk4kwz2"]'
-                ).text
-            except NoSuchElementException:
-                job_title = -1
-                logger.error('NoSuchElementException: Tried to save job title')
-            else:
-                logger.debug('Job title scraped')
-                logger.info(f"Job Title: {job_title}")
-
-            # from job page
-            # JOB DESCRIPTION
-            try:
-                job_description = driver.find_element(
-                    by=By.XPATH,
-                    value='.//div[@class="jobDescriptionContent desc"]'
-                ).text
-            except NoSuchElementException:
-                logger.error('NoSuchElementException: Tried to save job description but it is not available')
-                logger.debug('Trying to reload the job via job link/button')
-                job_link.click()
-                time.sleep(3)
-                try:
-                    job_description = driver.find_element(
-                        by=By.XPATH,
-                        value='.//div[@class="jobDescriptionContent desc"]'
-                    ).text
-                except NoSuchElementException:
-                    logger.error('NoSuchElementException: Tried to save job description a second time but it is still not available')
-                    job_description = -1
-            else:
-                logger.debug('Job description scraped')
-                logger.info(f"Job Description: {str(job_description)[:50]}")
+    # each worker thread reuses its own webdriver, started a little after the previous one's
+    local = threading.local()
+    worker_drivers = []
+    worker_drivers_lock = threading.Lock()
 
-            # SALARY ESTIMATE
-            try:
-                salary_estimate = driver.find_element(
-                    by=By.XPATH,
-                    value='.//div[@class="css-y2jiyn e2u4hf18"]'
-                ).text
-            except NoSuchElementException:
-                salary_estimate = -1
-                logger.error('NoSuchElementException: Tried to save salary estimate')
-            else:
-                logger.debug('Salary estimate scraped')
-                logger.info(f"Salary Estimate: {salary_estimate}")
+    def scrape_job_worker(job_url, job_number):
+        if not hasattr(local, 'driver'):
+            local.driver = init_driver()
+            with worker_drivers_lock:
+                delay = 0.1 * len(worker_drivers)  # 100 ms more than the previous worker
+                worker_drivers.append(local.driver)
+            # stagger the first request from each worker, with random jitter so the workers don't request pages in lockstep
+            time.sleep(delay + random.uniform(0, 0.5))
+        return scrape_job(local.driver, job_url, job_number, company_cache)
 
-            # COMPANY RATING (OVERALL)
-            try:
-                rating = driver.find_element(
-                    by=By.XPATH,
-                    value='.//span[@data-test="detailRating"]'
-                ).text
-            except NoSuchElementException:
-                rating = -1
-                logger.error('NoSuchElementException: Tried to save company rating (overall)')
-            else:
-                logger.debug('Company rating (overall) scraped')
-            finally:
-                logger.info(f"Rating: {rating}")
+    # initialise the progress bar
+    pbar = tqdm(desc='Progress', total=len(job_urls))
 
-            # COMPANY DETAILS
-            try:  # to find elements with company details
-                companydetails = driver.find_elements(
-                    by=By.XPATH,
-                    value=('//div[@class="d-flex justify-content-start css-daag8o e1pvx6aw2"]')
-                )
-            except NoSuchElementException:
-                logger.error("NoSuchElementException: Tried to save company details in Company tab (company details missing)")
-                size = -1
-                founded = -1
-                type_of_ownership = -1
-                industry = -1
-                sector = -1
-                revenue = -1
-            else:
-                companydetails_labels = []
-                companydetails_values = []
-                for i in companydetails:
-                    c = i.text
-                    x, y = c.split("\n", 1)  # the elements containing company details include both the label and the value
-                    companydetails_labels.append(x)
-                    companydetails_values.append(y)
-                # create a dict of company details so they can be searched
-                companydetails_dict = dict(zip(companydetails_labels, companydetails_values))
-                # search dict and assign company detail variables
-                size = companydetails_dict.get('Size', -1)
-                founded = companydetails_dict.get('Founded', -1)
-                type_of_ownership = companydetails_dict.get('Type', -1)
-                industry = companydetails_dict.get('Industry', -1)
-                sector = companydetails_dict.get('Sector', -1)
-                revenue = companydetails_dict.get('Revenue', -1)
-            finally:
-                logger.debug("Finished looking for COMPANY DETAILS")
-                logger.info(f"Size: {size}")
-                logger.info(f"Founded: {founded}")
-                logger.info(f"Type of Ownership: {type_of_ownership}")
-                logger.info(f"Industry: {industry}")
-                logger.info(f"Sector: {sector}")
-                logger.info(f"Revenue: {revenue}")
-
-            # SUBRATINGS
-            try:  # to find elements containing subratings
-                subratings = driver.find_elements(by=By.XPATH, value=('//span[@class="css-1hszvfg erz4gkm1"]'))
-            except NoSuchElementException:
-                logger.error("NoSuchElementException: Tried to save subratings (subratings missing)")
-                rating_culturevalues = -1
-                rating_worklifebalance = -1
-                rating_seniormgmt = -1
-                rating_compbenefits = -1
-                rating_careerops = -1
-            else:
-                subratings_list = []
-                for s in range(len(subratings)):
-                    subratings_list.append(subratings[s].text)  # alternates between the labels and values
-                # create a dict of subratings so they can be searched
-                subratings_dict = dict(zip(subratings_list[0::2], subratings_list[1::2]))
-                # search dict and assign company detail variables
-                rating_culturevalues = subratings_dict.get('Culture & Values', -1)
-                rating_worklifebalance = subratings_dict.get('Work/Life Balance', -1)
-                rating_seniormgmt = subratings_dict.get('Senior Management', -1)
-                rating_compbenefits = subratings_dict.get('Comp & Benefits', -1)
-                rating_careerops = subratings_dict.get('Career Opportunities', -1)
-            finally:
-                logger.debug("Finished looking for SUBRATINGS")
-                logger.info(f"Culture & Values: {rating_culturevalues}")
-                logger.info(f"Work/Life Balance: {rating_worklifebalance}")
-                logger.info(f"Senior Management: {rating_seniormgmt}")
-                logger.info(f"Comp & Benefits: {rating_compbenefits}")
-                logger.info(f"Career Opportunities: {rating_careerops}")
-
-            if path is not None:  # if a path has been provided
-                job_details = [
-                    job_title,
-                    salary_estimate,
-                    job_description,
-                    rating,
-                    company_name,
-                    location,
-                    size,
-                    founded,
-                    type_of_ownership,
-                    industry,
-                    sector,
-                    revenue,
-                    rating_culturevalues,
-                    rating_worklifebalance,
-                    rating_seniormgmt,
-                    rating_compbenefits,
-                    rating_careerops,
-                ]
-                # write data to the results csv file
-                with open(filename, 'a+', newline='', encoding='utf-8') as write_obj:
-                    # create a writer object from csv module
-                    csv_writer = writer(write_obj)
-                    # add contents of list as last row in the csv file
-                    csv_writer.writerow(job_details)
+    # open the results csv file once for the whole scrape
+    if path is not None:
+        write_obj = open(filename, 'a', newline='', encoding='utf-8')
+        # create a writer object from csv module
+        csv_writer = writer(write_obj)
+        # rows waiting to be written to the csv file, in batches of CSV_BATCH_SIZE
+        csv_batch = []
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(scrape_job_worker, job_url, job_number)
+                for job_number, job_url in enumerate(job_urls, start=1)
+            ]
+            # the jobs are scraped at the same time, but their results are taken in the order they were listed, /
+            # so the rows are written in the same order as the job listings
+            for job_number, future in enumerate(futures, start=1):
+                try:
+                    job_details = future.result()
+                except WebDriverException as e:
+                    logger.error(f"WebDriverException: Tried to scrape job {job_number} ({e.msg})")
+                    continue
+                except Exception:  # e.g. unexpected markup; skip the job rather than losing the rest of the scrape
+                    logger.exception(f"Tried to scrape job {job_number}")
+                    continue
+
+                if path is not None:  # if a path has been provided
+                    csv_batch.append(job_details)
+                    if len(csv_batch) == CSV_BATCH_SIZE:
+                        # add the batch of rows to the end of the csv file
+                        csv_writer.writerows(csv_batch)
+                        write_obj.flush()  # so the rows scraped so far are kept if the scrape stops early
+                        csv_batch.clear()
+                        # update log
+                        logger.debug(f"Batch of {CSV_BATCH_SIZE} jobs, up to job {job_number}, written to csv")
+                else:
+                    # add job info to jobs list for pandas DataFrame creation at the end
+                    jobs.append(job_details)
                     # update log
-                    logger.debug(f"Job {job_counter} details written to csv")
-            else:
-                # add job info to jobs dict for pandas DataFrame creation at the end
-                jobs.append({
-                    "job_title": job_title,
-                    "salary_estimate": salary_estimate,
-                    "job_description": job_description,
-                    "rating": rating,
-                    "company_name": company_name,
-                    "location": location,
-                    "size": size,
-                    "founded": founded,
-                    "type of ownership": type_of_ownership,
-                    "industry": industry,
-                    "sector": sector,
-                    "revenue": revenue,
-                    "rating_culturevalues": rating_culturevalues,
-                    "rating_worklifebalance": rating_worklifebalance,
-                    "rating_seniormgmt": rating_seniormgmt,
-                    "rating_compbenefits": rating_compbenefits,
-                    "rating_careerops": rating_careerops,
-                })
-                # update log
-                logger.debug(f"Job {job_counter} details appended to list as a dictionary for pandas DataFrame creation at the end")
-
-            # reset variables to default (null values)
-            job_title = -1
-            salary_estimate = -1
-            job_description = -1
-            rating = -1
-            company_name = -1
-            location = -1
-            size = -1
-            founded = -1
-            type_of_ownership = -1
-            industry = -1
-            sector = -1
-            revenue = -1
-            rating_culturevalues = -1
-            rating_worklifebalance = -1
-            rating_seniormgmt = -1
-            rating_compbenefits = -1
-            rating_careerops = -1
-
-            # update the progress bar
-            pbar.update(1)
-
-            # check whether you need to continue scraping
-            if job_counter == num_jobs:
-                logger.debug(f"Target reached: Jobs scraped = {job_counter} | Target = {num_jobs}")
-                break
-
-        if (len(vieweddate) == len(job_links)):
-            break
+                    logger.debug(f"Job {job_number} details appended to list as a tuple for pandas DataFrame creation at the end")
 
-        if job_counter == num_jobs:
-            logger.debug("TARGET NUMBER OF JOBS SCRAPED")
-            break
-
-        # click on the "next page" button
-        logger.debug("Trying to click the next page")
-        try:
-            driver.find_element(
-                by=By.XPATH,
-                value='.//button[@class="nextButton css-1hq9k8 e13qs2071"]'
-            ).click()
-            time.sleep(3)
-        except NoSuchElementException:
-            logger.error(f"NoSuchElementException: Link to next page unavailable; scraping terminated before reaching target number of jobs. Needed {num_jobs}, got {len(jobs)}.")
-            break
-        except ElementClickInterceptedException:
-            logger.error(f"ElementClickInterceptedException: Couldn't click next page button; scraping terminated before reaching target number of jobs. Needed {num_jobs}, got {len(jobs)}.")
-            break
-        else:
-            logger.debug("Clicked next page")
-            url_str = driver.current_url
-            if "pgc=" in url_str:
-                nextpage_counter += 1
-            else:
-                logger.error('"pgc=" not in URL, likely showing duplicate jobs')
-                sys.exit(1)
+                # update the progress bar
+                pbar.update(1)
+    finally:
+        if path is not None:
+            csv_writer.writerows(csv_batch)  # the last, partial batch
+            write_obj.close()
+        for worker_driver in worker_drivers:
+            worker_driver.quit()
 
     # update progress bar
     # pbar.close()
 
     # if path not given, pandas DataFrame will be returned
     if path is None:
-        # convert the jobs dictionary object into a DataFrame
-        df = pd.DataFrame(jobs)
+        # convert the jobs list into a DataFrame
+        df = pd.DataFrame(jobs, columns=COLS)
         logger.info(f"Data for {num_jobs} scraped and returned as a DataFrame")
         return df
     else:
@@ -484,9 +666,16 @@ def main():
         default=None,
         help="Provide path to the project folder to write scraped data to a CSV; otherwise, a pandas DataFrame will be returned "
     )
+    parser.add_argument(  # number of headless webdrivers scraping job pages at the same time
+        "--workers",
+        "-w",
+        type=int,
+        default=10,
+        help="The number of job pages to scrape at the same time (default 10)"
+    )
     args = parser.parse_args()
 
-    get_jobs(num_jobs=args.num_jobs, verbose=args.verbose, path=args.path)
+    get_jobs(num_jobs=args.num_jobs, verbose=args.verbose, path=args.path, workers=args.workers)
 
 
 if __name__ == '__main__':
@@ -3,8 +3,9 @@
 
 Keyword arguments:
     scrapedate -- the date of website scrape as it is in the data filename e.g. '14Dec2020'
-    path -- path to project data folder; will be searched for glassdoor jobs data file
+    path -- path to project data folder; will be searched for glassdoor jobs data file, and the OS API responses are cached there
     verbose -- stream log messages to stdout (default: False)
+    workers -- the number of OS Names API requests to make at the same time (default: 20)
 
 Returns:
     CSV file of the jobs dataframe with extra columns with the parsed location data from the OS API
@@ -14,19 +15,136 @@ Returns:
 import argparse
 import pandas as pd
 import numpy as np
+import orjson
 import os
 import requests
+import requests_cache
 import logging
 import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from functools import lru_cache
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from tqdm import tqdm
-from fuzzywuzzy import fuzz
+from rapidfuzz import fuzz, process
 from dotenv import load_dotenv
 
 load_dotenv()
 api_key = os.environ['OS_API_KEY']
 
+# the OS Names API local types of populated places that are recorded as the job's city/town/village/hamlet
+SETTLEMENT_TYPES = ('Town', 'City', 'Village', 'Hamlet', 'Suburban Area', 'Other Settlement')
+
+
+@lru_cache(maxsize=None)
+def get_session(path):
+    '''Creates the session shared by all API requests, so connections to the OS API are reused; /
+    retries with backoff when rate limited or on server errors, and successful responses are cached on disk /
+    (in the project data folder given by path) for 30 days, so each location is only searched for once; /
+    created once per data folder per Python session
+
+    Returns:
+        requests_cache.CachedSession
+    '''
+    session = requests_cache.CachedSession(
+        os.path.join(path, 'os_names_cache'),
+        backend='sqlite',
+        expire_after=timedelta(days=30),
+        ignored_parameters=['key'],  # the API key isn't part of the cache key, nor saved in the cache
+    )
+    adapter = HTTPAdapter(
+        pool_connections=20,
+        pool_maxsize=20,
+        max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])
+    )
+    session.mount('https://', adapter)
+    return session
+
+
+def fetch_location(query, session, api_key=api_key):
+    '''Searches the OS Names API for populated places matching the location query
+
+    Returns:
+        list of gazetteer entries in the response (empty if there are none), or None if the request failed
+    '''
+    logger = logging.getLogger(__name__)
+    url = f'https://api.os.uk/search/names/v1/find?query={query}&fq=LOCAL_TYPE:Town LOCAL_TYPE:City LOCAL_TYPE:Village LOCAL_TYPE:Hamlet LOCAL_TYPE:Suburban_Area LOCAL_TYPE:Other_Settlement&key={api_key}'
+    try:
+        r = session.get(url, timeout=10)
+    except requests.exceptions.RequestException as e:
+        logger.debug(f'Query ({query}) failed: {type(e).__name__}')  # not the message, which includes the URL and API key
+        return None
+    logger.debug(f'GET request status code for query, "{query}": {r.status_code}')
+    if (r.status_code == 200):  # The HTTP 200 (OK) status response code indicating that the request has succeeded
+        logger.debug('Successful GET request')
+        json_data = orjson.loads(r.content)  # only successful responses are parsed
+        return json_data.get('results', [])
+    else:
+        logger.debug(f'Query ({query}) failed')
+        return None
+
+
+def match_location(query, results):
+    '''Finds the first name in the OS Names API results that matches the location query, /
+    i.e. a perfect partial match or a close (> 80) match
+
+    Returns:
+        (name, gazetteer entry) for the match, or None if there isn't one
+    '''
+    # flatten the results into the names of each place (NAME2 is an optional alternative name, e.g. in Welsh)
+    candidates = [
+        (name, i['GAZETTEER_ENTRY'])
+        for i in results
+        for name in (i['GAZETTEER_ENTRY']['NAME1'], i['GAZETTEER_ENTRY'].get('NAME2'))
+        if name
+    ]
+    names = [name for name, entry in candidates]
+
+    # an exact match is cheap to find, and only the names before it need the fuzzy scores; processor=None keeps the /
+    # fuzzy scores case- and punctuation-sensitive, like the exact match (process.extract lowercases and strips punctuation by default)
+    end = names.index(query) if query in names else len(names)
+    matches = [end] if end < len(names) else []
+    matches += [m for _, _, m in process.extract(query, names[:end], scorer=fuzz.partial_ratio, processor=None, score_cutoff=100, limit=None)]
+    matches += [m for _, score, m in process.extract(query, names[:end], scorer=fuzz.ratio, processor=None, score_cutoff=80, limit=None) if score > 80]
+    return candidates[min(matches)] if matches else None
+
+
+@lru_cache(maxsize=None)
+def resolve_location(query, session, api_key=api_key):
+    '''Searches the OS Names API for the location query and parses the first matching place; /
+    the result is cached, so a query is only searched for and matched once per Python session
+
+    Returns:
+        (city/town/village/hamlet, region, country) of the match, or None if there isn't one; /
+        the city/town/village/hamlet is NaN if the match isn't a populated place
+
+    Raises:
+        LookupError if the API request failed (so that failed queries aren't cached)
+    '''
+    logger = logging.getLogger(__name__)
+    results = fetch_location(query, session, api_key=api_key)
+    if results is None:
+        raise LookupError(f'Query ({query}) failed')
+
+    match = match_location(query, results)
+    if match is None:
+        return None
+    name, entry = match
+    logger.debug(f'Query, "{query}" has resulted in a match')
+
+    region = entry.get('REGION', np.nan)
+    if (region == 'Eastern'):
+        region = 'East of England'
+        logger.debug('api_region was "Eastern"; it has been changed to "East of England"')
+    if (entry['LOCAL_TYPE'] in SETTLEMENT_TYPES):
+        return (name, region, entry.get('COUNTRY', np.nan))
+    else:
+        logger.debug(entry['LOCAL_TYPE'])
+        return (np.nan, region, entry.get('COUNTRY', np.nan))
+
 
-def get_locations(scrapedate, path, verbose=False, api_key=api_key):
+def get_locations(scrapedate, path, verbose=False, api_key=api_key, workers=20):
     class TqdmLoggingHandler(logging.Handler):
         def __init__(self, level=logging.NOTSET):
             super().__init__(level)
@@ -73,97 +191,68 @@ def get_locations(scrapedate, path, verbose=False, api_key=api_key):
     df['uk'] = False  # if the scraped job location is simply 'United Kingdom'
     df['remote'] = False  # if the scraped job location is 'Remote'
 
-    # iterate through the jobs and parse the scraped location data using The OS Name API if necessary
-    for index, row in tqdm(df.iterrows(), total=df.shape[0]):
-        location = df.loc[index, 'location']
-        logger.debug(f'\n\nJOB {index+1}: {location}...\n\n')
+    # split the scraped locations on commas into constituents; the first part is each job's query (NaN if the location is missing)
+    all_loc_parts = df['location'].str.split(', ')
+    all_queries = all_loc_parts.str[0]
 
-        # initialize a flag variable to indicate when the scraped location has been parsed
-        matchfound = False
+    # parse the locations where the OS Names API is not needed, for all jobs at once
+    northern_ireland = all_loc_parts.apply(lambda parts: isinstance(parts, list) and ('Northern Ireland' in parts))
+    df.loc[northern_ireland, 'api_region'] = 'Northern Ireland'  # the OS Names API does not work for Northern Ireland
+    df.loc[northern_ireland, 'api_country'] = 'Northern Ireland'
+    northern_ireland_place = northern_ireland & (all_queries != 'Northern Ireland')
+    df.loc[northern_ireland_place, 'api_citytownvilham'] = all_queries[northern_ireland_place]
+    logger.debug(f'{northern_ireland.sum()} jobs are in "Northern Ireland"; no need to use OS API')
 
-        # try splitting the scraped location on commas into constituents to get the first part
+    london = all_queries.isin(['London', 'City of London', 'Greater London'])
+    df.loc[london, 'api_citytownvilham'] = 'London'
+    df.loc[london, 'api_region'] = 'London'
+    df.loc[london, 'api_country'] = 'England'
+    logger.debug(f'Location query is simply London for {london.sum()} jobs; no need to use OS API')
+
+    country = all_queries.isin(['England', 'Scotland', 'Wales'])
+    df.loc[country, 'api_country'] = all_queries[country]
+    logger.debug(f'Only the country has been given for {country.sum()} jobs; no need to use OS API')
+
+    df['uk'] = (all_queries == 'United Kingdom')
+    logger.debug(f'Location query is simply "United Kingdom" (no specific part of the UK) for {df["uk"].sum()} jobs; no need to use OS API')
+
+    df['remote'] = (all_queries == 'Remote')
+    logger.debug(f'Location query is "Remote" (not a location) for {df["remote"].sum()} jobs; no need to use OS API')
+
+    # jobs with locations that need to be searched for using the OS Names API
+    need_api = all_queries.notna() & ~(northern_ireland | london | country | df['uk'] | df['remote'])
+    api_queries = all_queries[need_api]
+
+    # search the OS Names API for the remaining locations, several queries at a time
+    # many jobs share a location, so each distinct query is only searched for once
+    queries = list(dict.fromkeys(api_queries))
+    logger.debug(f'Using the OS Names API for {len(api_queries)} jobs ({len(queries)} distinct queries)')
+
+    # the API responses are cached in the project data folder
+    session = get_session(path)
+
+    # a function to resolve a query, where failed queries don't have a result
+    def resolve(query):
         try:
-            loc_parts = location.split(', ')
-            logger.debug(f'Location for job {index+1} split into constituents = {loc_parts}')
-        except Exception as e:
-            logger.debug(e)
-            continue
-
-        if ('Northern Ireland' in loc_parts):
-            logger.debug('The job is in "Northern Ireland"; the OS Names API does not work for Northern Ireland')
-            df.loc[index, 'api_region'] = 'Northern Ireland'
-            df.loc[index, 'api_country'] = 'Northern Ireland'
-            if (loc_parts[0] != 'Northern Ireland'):
-                df.loc[index, 'api_citytownvilham'] = loc_parts[0]
-            matchfound = True
-
-        query = loc_parts[0]
-
-        if ((query == 'London') or (query == 'City of London') or (query == 'Greater London')):
-            df.loc[index, 'api_citytownvilham'] = 'London'
-            df.loc[index, 'api_region'] = 'London'
-            df.loc[index, 'api_country'] = 'England'
-            logger.debug(f'Location query is simply {query}; no need to use OS API')
-            matchfound = True
-
-        if ((query == 'England') or (query == 'Scotland') or (query == 'Wales')):
-            df.loc[index, 'api_country'] = query
-            logger.debug('Only the country has been given; no need to use OS API')
-            matchfound = True
-
-        if (query == 'United Kingdom'):
-            logger.debug(f'Location query is simply {query} (no specific part of the UK); no need to use OS API')
-            df.loc[index, 'uk'] = True
-            matchfound = True
-
-        if (query == 'Remote'):
-            logger.debug(f'Location query is "{query}" (not a location); no need to use OS API')
-            df.loc[index, 'remote'] = True
-            matchfound = True
-
-        if matchfound:
-            pass
-        else:
-            logger.debug('Need to use the OS Names API')
-            url = f'https://api.os.uk/search/names/v1/find?query={query}&fq=LOCAL_TYPE:Town LOCAL_TYPE:City LOCAL_TYPE:Village LOCAL_TYPE:Hamlet LOCAL_TYPE:Suburban_Area LOCAL_TYPE:Other_Settlement&key={api_key}'
-            r = requests.get(url)
-            logger.debug(f'GET request status code: {r.status_code}')
-            json_data = r.json()
-            if (r.status_code == 200):  # The HTTP 200 (OK) status response code indicating that the request has succeeded
-                logger.debug('Successful GET request')
-                if ('results' in json_data):
-                    logger.debug('There are "results" in json recieved in response to the GET request for the query, "{query}"')
-                    for i in json_data['results']:
-                        if matchfound:
-                            break
-                        else:
-                            for x in [i['GAZETTEER_ENTRY']['NAME1'], i['GAZETTEER_ENTRY'].get('NAME2', '')]:
-                                if ((fuzz.partial_ratio(query, x) == 100) or (fuzz.ratio(query, x) > 80)):
-                                    logger.debug(f'Query, "{query}" has resulted in a match')
-                                    matchfound = True
-                                    if ('London' in loc_parts[1:]):
-                                        df.loc[index, 'api_citytownvilham'] = query
-                                        df.loc[index, 'api_region'] = 'London'
-                                        df.loc[index, 'api_country'] = 'England'
-                                        break
-                                    elif((i['GAZETTEER_ENTRY']['LOCAL_TYPE'] == 'Town') or (i['GAZETTEER_ENTRY']['LOCAL_TYPE'] == 'City') or (i['GAZETTEER_ENTRY']['LOCAL_TYPE'] == 'Village') or (i['GAZETTEER_ENTRY']['LOCAL_TYPE'] == 'Hamlet') or (i['GAZETTEER_ENTRY']['LOCAL_TYPE'] == 'Suburban Area') or (i['GAZETTEER_ENTRY']['LOCAL_TYPE'] == 'Other Settlement')):
-                                        df.loc[index, 'api_citytownvilham'] = x
-                                        df.loc[index, 'api_region'] = i['GAZETTEER_ENTRY'].get('REGION', np.nan)
-                                        df.loc[index, 'api_country'] = i['GAZETTEER_ENTRY'].get('COUNTRY', np.nan)
-                                        break
-                                    else:
-                                        logger.debug(i['GAZETTEER_ENTRY']['LOCAL_TYPE'])
-                                        df.loc[index, 'api_citytownvilham'] = np.nan
-                                        df.loc[index, 'api_region'] = i['GAZETTEER_ENTRY'].get('REGION', np.nan)
-                                        df.loc[index, 'api_country'] = i['GAZETTEER_ENTRY'].get('COUNTRY', np.nan)
-                                        break
-                            if (df.loc[index, 'api_region'] == 'Eastern'):
-                                df.loc[index, 'api_region'] = 'East of England'
-                                logger.debug(f'api_region was {df.loc[index, "api_region"]}; it has been changed to "East of England"')
-            else:
-                logger.debug(f'Query ({query}) failed')
-
-        logger.debug(f'\nFinal Results:\napi_citytownvilham = {df.loc[index, "api_citytownvilham"]}\napi_region = {df.loc[index, "api_region"]}\napi_country = {df.loc[index, "api_country"]}\nuk_nonspecific = {df.loc[index, "uk"]}\nremote = {df.loc[index, "remote"]}\n')
+            return resolve_location(query, session, api_key=api_key)
+        except LookupError:
+            return None
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        api_results = dict(zip(queries, tqdm(executor.map(resolve, queries), total=len(queries))))
+    logger.debug(resolve_location.cache_info())
+
+    # parse the location of every job from the result of its API query at once; jobs without a result stay NaN
+    api_cols = ['api_citytownvilham', 'api_region', 'api_country']
+    resolved = api_queries.map(api_results)
+    resolved = resolved[resolved.notna()]
+    api_locations = pd.DataFrame(resolved.tolist(), index=resolved.index, columns=api_cols)
+    # jobs with London after the query (e.g. "Canary Wharf, London") are in London, whichever place the query matched
+    in_london = all_loc_parts[resolved.index].apply(lambda parts: 'London' in parts[1:])
+    api_locations.loc[in_london, 'api_citytownvilham'] = api_queries[resolved.index][in_london]
+    api_locations.loc[in_london, ['api_region', 'api_country']] = ['London', 'England']
+    df.loc[api_locations.index, api_cols] = api_locations
+    logger.debug(f'The OS Names API found the location of {len(api_locations)} of {len(api_queries)} jobs')
 
     # create a summary table of the parsed locations in the DataFrame so mistakes can be easily spotted
     logger.debug(pd.DataFrame(df.value_counts(subset=['location', 'api_citytownvilham', 'api_region', 'api_country', 'uk', 'remote'], dropna=False)))
@@ -192,6 +281,14 @@ def main():
         help="Streams log messages to stdout"
     )
 
+    parser.add_argument(  # number of API requests made at the same time
+        "--workers",
+        "-w",
+        type=int,
+        default=20,
+        help="The number of OS Names API requests to make at the same time (default 20)"
+    )
+
     parser.add_argument(  # if you want scraped information to be logged
         "--apikey",
         type=str,
@@ -200,7 +297,7 @@ def main():
 
     args = parser.parse_args()
 
-    df_main = get_locations(args.scrapedate, args.path, args.verbose)
+    df_main = get_locations(args.scrapedate, args.path, args.verbose, workers=args.workers)
 
     # save results as a CSV file
     filename = os.path.join(args.path, f'gdjobs_df_{args.scrapedate}_locationparsed.csv')
@@ -0,0 +1,47 @@
+import lxml.html
+
+from dsjobs_pt1_glassdoorscraper import XP_COMPANY, XP_SUBRATING, element_text, flex_text
+
+
+def test_element_text_keeps_inline_markup_on_one_line():
+    p = lxml.html.fromstring('<p>You will have a <b>degree</b> in Mathematics and use machine <a>learning</a></p>')
+    assert element_text(p) == 'You will have a degree in Mathematics and use machine learning'
+
+
+def test_element_text_breaks_lines_at_block_elements():
+    div = lxml.html.fromstring(
+        '<div><p>About the role</p><ul><li>A <b>degree</b> in Physics</li><li>Python</li></ul>Apply<br>now</div>'
+    )
+    assert element_text(div) == 'About the role\nA degree in Physics\nPython\nApply\nnow'
+
+
+def test_flex_text_puts_company_name_and_rating_on_separate_lines():
+    header = lxml.html.fromstring(
+        '<div class="css-16nw49e e11nt52q1">'
+        '<div class="css-xuk5ye e1tk4kwz5">infarm<span class="css-1pmc6te e11nt52q4">4.1<span class="SVGInline"></span></span></div>'
+        '</div>'
+    )
+    assert flex_text(XP_COMPANY(header)[0]) == 'infarm\n4.1'
+
+
+def test_flex_text_splits_company_detail_label_and_value():
+    detail = lxml.html.fromstring(
+        '<div class="d-flex justify-content-start css-daag8o e1pvx6aw2">'
+        '<span class="css-1taruhi e1pvx6aw1">Size</span><span class="css-i9gxme e1pvx6aw2">51 to 200 Employees</span>'
+        '</div>'
+    )
+    assert flex_text(detail) == 'Size\n51 to 200 Employees'
+
+
+def test_subrating_without_a_value_does_not_shift_the_others():
+    span = '<span class="css-1hszvfg erz4gkm1">{}</span>'.format
+    subratings = lxml.html.fromstring(
+        '<div>'
+        + span('Culture &amp; Values') + span('4.0')
+        + span('Work/Life Balance')  # missing value
+        + span('Senior Management') + span('3.5')
+        + '</div>'
+    )
+    assert [element_text(value) for value in XP_SUBRATING(subratings, label='Culture & Values')] == ['4.0']
+    assert XP_SUBRATING(subratings, label='Work/Life Balance') == []
+    assert [element_text(value) for value in XP_SUBRATING(subratings, label='Senior Management')] == ['3.5']